@@ -0,0 +1,231 @@
+"""An in-memory stand-in for the Docker Engine API, served over a unix socket.
+
+It implements just the endpoints the bot uses, keeps containers in a dict
+and sleeps for a configurable latency on every call, so benchmarks exercise
+the bot's real HTTP client without a Docker daemon.
+"""
+import asyncio
+import itertools
+import json
+
+from aiohttp import web
+
+API = "/v1.41"
+FAKE_SSH_LINE = "ssh fakesession@nyc1.tmate.io"
+
+
+class FakeDockerEngine:
+    def __init__(self, socket_path, latency=0.0, ncpu=1024, memory=1 << 50):
+        self.socket_path = socket_path
+        self.latency = latency
+        self.ncpu = ncpu
+        self.memory = memory
+        self.containers = {}
+        self.execs = {}
+        # Ids of containers with a tmate server running
+        self.tmate = set()
+        self.images = set()
+        self.calls = 0
+        self.ids = itertools.count(1)
+        self._runner = None
+        self._stopping = asyncio.Event()
+
+    def add_container(self, name, labels=None, running=True, cpus=1, memory=2 << 30):
+        """Adds a container directly, as if it had been created before the bot started."""
+        container_id = f"{next(self.ids):064x}"
+        self.containers[container_id] = {
+            "Id": container_id,
+            "Name": f"/{name}",
+            "Config": {"Labels": labels or {}, "Image": "ubuntu:22.04"},
+            "HostConfig": {"Memory": memory, "NanoCpus": int(cpus * 1_000_000_000)},
+            "State": {"Status": "running" if running else "exited", "Running": running},
+        }
+        return container_id
+
+    def reset(self):
+        self.containers.clear()
+        self.execs.clear()
+        self.tmate.clear()
+        self.calls = 0
+
+    def _find(self, ref):
+        if ref in self.containers:
+            return self.containers[ref]
+        for container in self.containers.values():
+            if container["Name"] == f"/{ref}":
+                return container
+        return None
+
+    @web.middleware
+    async def _latency(self, request, handler):
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return await handler(request)
+
+    @staticmethod
+    def _not_found(what):
+        return web.json_response({"message": f"No such {what}"}, status=404)
+
+    async def _info(self, request):
+        return web.json_response({"NCPU": self.ncpu, "MemTotal": self.memory})
+
+    async def _list(self, request):
+        filters = json.loads(request.query.get("filters", "{}") or "{}")
+        wanted_labels = filters.get("label", [])
+        listed = []
+        for container in self.containers.values():
+            labels = container["Config"]["Labels"]
+            if any(label not in labels for label in wanted_labels):
+                continue
+            listed.append({
+                "Id": container["Id"], "Names": [container["Name"]],
+                "State": container["State"]["Status"], "Labels": labels,
+            })
+        return web.json_response(listed)
+
+    async def _create(self, request):
+        body = await request.json()
+        name = request.query["name"]
+        if self._find(name):
+            return web.json_response({"message": f"Conflict: {name} already exists"}, status=409)
+        if body["Image"] not in self.images:
+            return self._not_found(f"image: {body['Image']}")
+        host_config = body.get("HostConfig", {})
+        container_id = self.add_container(
+            name, body.get("Labels"), running=False,
+            cpus=host_config.get("NanoCpus", 0) / 1_000_000_000, memory=host_config.get("Memory", 0)
+        )
+        return web.json_response({"Id": container_id, "Warnings": []}, status=201)
+
+    async def _inspect(self, request):
+        container = self._find(request.match_info["ref"])
+        return web.json_response(container) if container else self._not_found("container")
+
+    def _set_running(self, request, running):
+        container = self._find(request.match_info["ref"])
+        if not container:
+            return self._not_found("container")
+        container["State"] = {"Status": "running" if running else "exited", "Running": running}
+        # Stopping or restarting a container ends its processes, tmate included
+        self.tmate.discard(container["Id"])
+        return web.Response(status=204)
+
+    async def _start(self, request):
+        return self._set_running(request, True)
+
+    async def _stop(self, request):
+        return self._set_running(request, False)
+
+    async def _restart(self, request):
+        return self._set_running(request, True)
+
+    async def _remove(self, request):
+        container = self._find(request.match_info["ref"])
+        if not container:
+            return self._not_found("container")
+        del self.containers[container["Id"]]
+        self.tmate.discard(container["Id"])
+        return web.Response(status=204)
+
+    async def _rename(self, request):
+        container = self._find(request.match_info["ref"])
+        if not container:
+            return self._not_found("container")
+        container["Name"] = f"/{request.query['name']}"
+        return web.Response(status=204)
+
+    async def _stats(self, request):
+        if not self._find(request.match_info["ref"]):
+            return self._not_found("container")
+        return web.json_response({
+            "cpu_stats": {"cpu_usage": {"total_usage": 200_000}, "system_cpu_usage": 10_000_000, "online_cpus": 2},
+            "precpu_stats": {"cpu_usage": {"total_usage": 100_000}, "system_cpu_usage": 9_000_000},
+            "memory_stats": {"usage": 512 << 20, "limit": 2 << 30, "stats": {"inactive_file": 64 << 20}},
+            "networks": {"eth0": {"rx_bytes": 1024, "tx_bytes": 2048}},
+            "blkio_stats": {"io_service_bytes_recursive": []},
+        })
+
+    async def _exec_create(self, request):
+        container = self._find(request.match_info["ref"])
+        if not container:
+            return self._not_found("container")
+        body = await request.json()
+        exec_id = f"{next(self.ids):064x}"
+        self.execs[exec_id] = {"container": container["Id"], "cmd": body["Cmd"], "exit_code": None}
+        return web.json_response({"Id": exec_id}, status=201)
+
+    async def _exec_start(self, request):
+        exec_instance = self.execs.get(request.match_info["id"])
+        if exec_instance is None:
+            return self._not_found("exec instance")
+        command, container_id = exec_instance["cmd"], exec_instance["container"]
+        output, exit_code = b"", 0
+        # tmate's "display -p '#{tmate_ssh}'" is the only command whose output the bot reads
+        if "display" in command:
+            if container_id in self.tmate:
+                output = f"{FAKE_SSH_LINE}\n".encode()
+            else:
+                exit_code = 1
+        elif "new-session" in command:
+            self.tmate.add(container_id)
+        elif "kill-server" in " ".join(command):
+            self.tmate.discard(container_id)
+        exec_instance["exit_code"] = exit_code
+        frame = bytes([1, 0, 0, 0]) + len(output).to_bytes(4, "big") + output if output else b""
+        return web.Response(body=frame, content_type="application/vnd.docker.raw-stream")
+
+    async def _exec_inspect(self, request):
+        exec_instance = self.execs.get(request.match_info["id"])
+        if exec_instance is None:
+            return self._not_found("exec instance")
+        return web.json_response({"ExitCode": exec_instance["exit_code"] or 0, "Running": False})
+
+    async def _pull(self, request):
+        self.images.add(f"{request.query['fromImage']}:{request.query.get('tag', 'latest')}")
+        return web.Response(text='{"status":"Downloaded newer image"}\n')
+
+    async def _inspect_image(self, request):
+        name = request.match_info["name"]
+        if name not in self.images:
+            return self._not_found("image")
+        return web.json_response({"Id": f"sha256:{abs(hash(name)):064x}"[:71], "RepoTags": [name], "Size": 80 << 20})
+
+    async def _build(self, request):
+        await request.read()
+        self.images.add(request.query["t"])
+        return web.Response(text='{"stream":"Successfully built"}\n')
+
+    async def _events(self, request):
+        response = web.StreamResponse()
+        await response.prepare(request)
+        await self._stopping.wait()
+        return response
+
+    async def start(self):
+        app = web.Application(middlewares=[self._latency])
+        app.router.add_get(f"{API}/info", self._info)
+        app.router.add_get(f"{API}/containers/json", self._list)
+        app.router.add_post(f"{API}/containers/create", self._create)
+        app.router.add_get(f"{API}/containers/{{ref}}/json", self._inspect)
+        app.router.add_post(f"{API}/containers/{{ref}}/start", self._start)
+        app.router.add_post(f"{API}/containers/{{ref}}/stop", self._stop)
+        app.router.add_post(f"{API}/containers/{{ref}}/restart", self._restart)
+        app.router.add_post(f"{API}/containers/{{ref}}/rename", self._rename)
+        app.router.add_delete(f"{API}/containers/{{ref}}", self._remove)
+        app.router.add_get(f"{API}/containers/{{ref}}/stats", self._stats)
+        app.router.add_post(f"{API}/containers/{{ref}}/exec", self._exec_create)
+        app.router.add_post(f"{API}/exec/{{id}}/start", self._exec_start)
+        app.router.add_get(f"{API}/exec/{{id}}/json", self._exec_inspect)
+        app.router.add_post(f"{API}/images/create", self._pull)
+        app.router.add_get(f"{API}/images/{{name}}/json", self._inspect_image)
+        app.router.add_post(f"{API}/build", self._build)
+        app.router.add_get(f"{API}/events", self._events)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.UnixSite(self._runner, self.socket_path).start()
+
+    async def stop(self):
+        self._stopping.set()
+        if self._runner is not None:
+            await self._runner.cleanup()
@@ -0,0 +1,359 @@
+"""Offline benchmarks for the bot's slash commands.
+
+Drives /create, /node, /nodedmin, /regen and the delete-all confirmation
+against the in-memory Docker Engine stub in fake_docker.py, with fake
+Discord interactions, and reports p50/p99 latency and throughput for each
+container count. Results can be saved as a baseline and later runs compared
+against it, exiting non-zero when something regressed.
+
+    python benchmarks/run.py --containers 10,100,1000 --latency 0.002
+    python benchmarks/run.py --save-baseline benchmarks/baseline.json
+    python benchmarks/run.py --nodes 3 --containers 100
+    python benchmarks/run.py --baseline benchmarks/baseline.json
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ADMIN_ID = 1
+SCENARIOS = ("create", "node", "nodedmin", "regen", "deleteall")
+
+
+# --- Fake Discord interactions ---
+class FakeUser:
+    def __init__(self, user_id, latency):
+        self.id = user_id
+        self.latency = latency
+        self.dms = []
+        self.dm_received = asyncio.Event()
+
+    def __str__(self):
+        return f"bench-user-{self.id}"
+
+    async def send(self, *args, **kwargs):
+        await asyncio.sleep(self.latency)
+        self.dms.append(kwargs.get("embed"))
+        self.dm_received.set()
+
+
+class FakeMessage:
+    def __init__(self, latency):
+        self.latency = latency
+
+    async def edit(self, **kwargs):
+        await asyncio.sleep(self.latency)
+
+
+class FakeResponse:
+    def __init__(self, latency):
+        self.latency = latency
+        self._done = False
+
+    async def defer(self, **kwargs):
+        await asyncio.sleep(self.latency)
+        self._done = True
+
+    async def send_message(self, *args, **kwargs):
+        await asyncio.sleep(self.latency)
+        self._done = True
+
+    def is_done(self):
+        return self._done
+
+
+class FakeFollowup:
+    def __init__(self, latency):
+        self.latency = latency
+        self.sent = []
+        self.view = None
+
+    async def send(self, *args, **kwargs):
+        await asyncio.sleep(self.latency)
+        self.sent.append(kwargs.get("embed") or (args[0] if args else None))
+        self.view = kwargs.get("view")
+        return FakeMessage(self.latency)
+
+
+class FakeInteraction:
+    """Just enough of discord.Interaction for the command handlers; every REST call sleeps for latency."""
+    def __init__(self, user_id, command_name, latency=0.0):
+        self.user = FakeUser(user_id, latency)
+        self.response = FakeResponse(latency)
+        self.followup = FakeFollowup(latency)
+        self.command = SimpleNamespace(name=command_name)
+        self.data = {}
+        self.latency = latency
+
+    async def edit_original_response(self, **kwargs):
+        await asyncio.sleep(self.latency)
+
+
+# --- Harness ---
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies, wall, operations, errors):
+    latencies = sorted(latencies)
+    return {
+        "runs": len(latencies),
+        "errors": errors,
+        "p50": percentile(latencies, 0.50),
+        "p99": percentile(latencies, 0.99),
+        "throughput": operations / wall if wall else None,
+    }
+
+
+class Benchmark:
+    def __init__(self, v1, engines, args):
+        self.v1 = v1
+        # One fake daemon per Docker node, in the order of v1.nodes
+        self.engines = dict(zip(v1.nodes, engines))
+        self.args = args
+        self.commands = {command.name: command for command in v1.bot.tree.get_commands()}
+        self.next_user = 10_000_000
+
+    def interaction(self, user_id, command_name):
+        return FakeInteraction(user_id, command_name, self.args.discord_latency)
+
+    async def prepare(self, count):
+        """Resets the fake daemon, database and caches to count bot-owned containers."""
+        v1 = self.v1
+        for engine in self.engines.values():
+            engine.reset()
+        await v1.db.execute("DELETE FROM vps_instances")
+        v1.container_metrics.clear()
+        instances = []
+        node_names = list(self.engines)
+        for index in range(count):
+            name, owner = f"bench-{index}", str(1000 + index)
+            # Spread round-robin so listings, stats and teardown fan out across every node
+            node_name = node_names[index % len(node_names)]
+            self.engines[node_name].add_container(name, {"owner": owner, "tier": "4inv"})
+            instances.append({
+                "user": owner, "container_name": name, "ssh_command": "ssh seeded@tmate",
+                "ram_limit": "2g", "cpu_limit": "1", "creator": "bench", "ports": [],
+                "node": node_name,
+            })
+        await v1.add_many_to_database(instances)
+        for node in v1.nodes.values():
+            await node.cache.seed()
+        # A running bot has sampled at least once, so the ring-buffer path is what commands hit
+        v1.record_container_samples(await v1.sample_containers())
+
+    async def create(self, index, count):
+        self.next_user += 1
+        interaction = self.interaction(self.next_user, "create")
+        await self.commands["create"].callback(interaction, tier="4inv")
+        # Pick the tier's default OS from the dropdown, as a user would
+        interaction.data = {"values": [self.v1.TIER_SPECS["4inv"]["os"]]}
+        await interaction.followup.view.select_callback(interaction)
+        return len(interaction.user.dms) == 1
+
+    async def node(self, index, count):
+        interaction = self.interaction(ADMIN_ID, "node")
+        await self.commands["node"].callback(interaction)
+        return bool(interaction.followup.sent)
+
+    async def nodedmin(self, index, count):
+        interaction = self.interaction(ADMIN_ID, "nodedmin")
+        await self.commands["nodedmin"].callback(interaction)
+        return bool(interaction.followup.sent)
+
+    async def regen(self, index, count):
+        interaction = self.interaction(1000 + index % count, "regen")
+        await self.commands["regen"].callback(interaction, container_name=None)
+        # The SSH command is DMed in the background after the reply
+        await asyncio.wait_for(interaction.user.dm_received.wait(), timeout=5)
+        return len(interaction.user.dms) == 1
+
+    async def run_concurrently(self, scenario, count):
+        """Runs a scenario args.iterations times with args.concurrency calls in flight."""
+        semaphore = asyncio.Semaphore(self.args.concurrency)
+        latencies, errors = [], 0
+
+        async def _one(index):
+            nonlocal errors
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    ok = await getattr(self, scenario)(index, count)
+                except Exception as e:
+                    logging.error(f"{scenario} run {index} raised: {e!r}")
+                    ok = False
+                latencies.append(time.perf_counter() - started)
+                errors += not ok
+
+        started = time.perf_counter()
+        await asyncio.gather(*(_one(index) for index in range(self.args.iterations)))
+        return summarize(latencies, time.perf_counter() - started, self.args.iterations, errors)
+
+    async def deleteall(self, count):
+        """Times the delete-all confirmation, which consumes the fleet, so every repeat re-seeds it."""
+        latencies, errors, wall = [], 0, 0.0
+        for _ in range(self.args.repeat):
+            await self.prepare(count)
+            interaction = self.interaction(ADMIN_ID, "deleteall")
+            view = self.v1.ConfirmView(None, None, is_delete_all=True)
+            started = time.perf_counter()
+            await view.confirm_button.callback(interaction)
+            elapsed = time.perf_counter() - started
+            latencies.append(elapsed)
+            wall += elapsed
+            errors += any(engine.containers for engine in self.engines.values()) or await self.v1.count_all_instances() != 0
+        # Throughput here is containers deleted per second
+        return summarize(latencies, wall, count * self.args.repeat, errors)
+
+    async def run(self):
+        results = {}
+        for count in self.args.containers:
+            for scenario in self.args.scenarios:
+                if scenario == "deleteall":
+                    result = await self.deleteall(count)
+                else:
+                    await self.prepare(count)
+                    result = await self.run_concurrently(scenario, count)
+                result["docker_calls"] = sum(engine.calls for engine in self.engines.values())
+                results[f"{scenario}@{count}"] = result
+                print(format_result(f"{scenario}@{count}", result), flush=True)
+        return results
+
+
+# --- Reporting and baselines ---
+def format_ms(seconds):
+    return f"{seconds * 1000:9.2f}" if seconds is not None else "      N/A"
+
+
+def format_result(key, result):
+    throughput = f"{result['throughput']:10.1f}" if result["throughput"] is not None else "       N/A"
+    return (f"{key:<20} p50 {format_ms(result['p50'])} ms  p99 {format_ms(result['p99'])} ms  "
+            f"{throughput} ops/s  errors {result['errors']}")
+
+
+def compare(results, baseline, tolerance):
+    """Returns a line per metric that is worse than the baseline by more than tolerance."""
+    regressions = []
+    for key, result in results.items():
+        previous = baseline.get(key)
+        if previous is None:
+            continue
+        for metric in ("p50", "p99"):
+            if previous.get(metric) and result[metric] > previous[metric] * (1 + tolerance):
+                regressions.append(f"{key} {metric}: {format_ms(previous[metric]).strip()} ms -> {format_ms(result[metric]).strip()} ms")
+        if previous.get("throughput") and result["throughput"] < previous["throughput"] * (1 - tolerance):
+            regressions.append(f"{key} throughput: {previous['throughput']:.1f} -> {result['throughput']:.1f} ops/s")
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--containers", default="10,100,1000",
+                        type=lambda value: [int(count) for count in value.split(",")],
+                        help="Comma-separated fleet sizes to benchmark (10 to 10000)")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS),
+                        type=lambda value: [name for name in value.split(",") if name],
+                        help=f"Comma-separated scenarios from: {', '.join(SCENARIOS)}")
+    parser.add_argument("--latency", type=float, default=0.001, help="Seconds the fake daemon waits per API call")
+    parser.add_argument("--discord-latency", type=float, default=0.0, help="Seconds each fake Discord REST call takes")
+    parser.add_argument("--iterations", type=int, default=50, help="Calls per scenario and fleet size")
+    parser.add_argument("--concurrency", type=int, default=10, help="Calls in flight at once")
+    parser.add_argument("--repeat", type=int, default=3, help="Delete-all runs per fleet size")
+    parser.add_argument("--nodes", type=int, default=1, help="Fake Docker daemons to run as separate nodes")
+    parser.add_argument("--control-workers", type=int, default=0, help="CONTROL_WORKERS for the bot under test")
+    parser.add_argument("--baseline", help="Compare against this baseline file and exit 1 on regressions")
+    parser.add_argument("--save-baseline", help="Write the results to this baseline file")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative slowdown before a regression is reported")
+    args = parser.parse_args(argv)
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    return args
+
+
+def node_sockets(workdir, count):
+    return [os.path.join(workdir, f"docker-{index}.sock") for index in range(count)]
+
+
+async def main(args, workdir):
+    from fake_docker import FakeDockerEngine
+
+    engines = [FakeDockerEngine(socket_path, latency=args.latency) for socket_path in node_sockets(workdir, args.nodes)]
+    for engine in engines:
+        await engine.start()
+    # Imported only once the environment points it at the stub and a scratch database
+    v1 = importlib.import_module("v1")
+    v1.control_plane.start()
+    try:
+        return await Benchmark(v1, engines, args).run()
+    finally:
+        for task in list(v1.background_tasks):
+            task.cancel()
+        for node in v1.nodes.values():
+            await node.client.close()
+        for engine in engines:
+            await engine.stop()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    # Resolved now because the working directory changes below
+    args.baseline = args.baseline and os.path.abspath(args.baseline)
+    args.save_baseline = args.save_baseline and os.path.abspath(args.save_baseline)
+    workdir = tempfile.mkdtemp(prefix="vps-bench-")
+    os.environ.update({
+        "BOT_TOKEN": os.environ.get("BOT_TOKEN", "benchmark"),
+        "ADMIN_IDS": str(ADMIN_ID),
+        "DOCKER_HOST": f"unix://{node_sockets(workdir, 1)[0]}",
+        "RAM_LIMIT": "1000000g",
+        "SERVER_LIMIT": "1000000",
+        "WARM_POOL_SIZES": ",".join(f"{tier}=0" for tier in ("4inv", "1boost", "1m_owo")),
+        "METRICS_PORT": "0",
+        "CONTROL_WORKERS": str(args.control_workers),
+        # Measure the commands themselves, not the throttling in front of them
+        "RATE_LIMITS": json.dumps({
+            command_class: {scope: {"burst": 10 ** 9, "per_minute": 10 ** 9} for scope in ("user", "global")}
+            for command_class in ("provision", "session", "tunnel")
+        }),
+    })
+    if args.nodes > 1:
+        # One node per stub, so placement, per-node teardown and the stats fan-out are exercised
+        os.environ["DOCKER_NODES"] = json.dumps([
+            {"name": f"node{index}", "url": f"unix://{socket_path}", "public_ip": f"127.0.0.{index + 1}"}
+            for index, socket_path in enumerate(node_sockets(workdir, args.nodes))
+        ])
+    else:
+        # A single local node pointed at the stub
+        os.environ.pop("DOCKER_NODES", None)
+    sys.path[:0] = [REPO_ROOT, os.path.dirname(os.path.abspath(__file__))]
+    # The bot keeps its database in the working directory
+    os.chdir(workdir)
+    logging.basicConfig(level=logging.WARNING)
+    results = asyncio.run(main(args, workdir))
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump({"settings": {key: value for key, value in vars(args).items() if key not in ("baseline", "save_baseline")},
+                       "results": results}, f, indent=2)
+        print(f"Saved baseline to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.tolerance:.0%} of {args.baseline}")
@@ -0,0 +1,247 @@
+"""Asyncio client for the Docker Engine API and the control-plane worker entry point.
+
+This module has no import-time side effects: control-plane workers are
+spawned with _control_worker_main as their target and import only this
+module and metrics.py, not the bot.
+"""
+import asyncio
+import json
+import ssl
+
+import aiohttp
+
+from metrics import Histogram, timed
+
+DOCKER_SECONDS = Histogram("vps_bot_docker_api_seconds", "Docker Engine API call duration.", ("operation", "outcome"))
+
+class DockerError(Exception):
+    """Raised when the Docker daemon rejects a request or can't be reached."""
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+    def __reduce__(self):
+        # Keeps the status when errors are sent back from control-plane workers
+        return type(self), (str(self), self.status)
+
+class DockerNotFound(DockerError):
+    """Raised when a container, image or exec instance doesn't exist."""
+
+def demux_docker_stream(data):
+    """Splits a multiplexed exec/attach stream into (stdout, stderr) bytes."""
+    stdout, stderr = bytearray(), bytearray()
+    offset = 0
+    while offset + 8 <= len(data):
+        stream_type = data[offset]
+        size = int.from_bytes(data[offset + 4:offset + 8], 'big')
+        payload = data[offset + 8:offset + 8 + size]
+        (stderr if stream_type == 2 else stdout).extend(payload)
+        offset += 8 + size
+    return bytes(stdout), bytes(stderr)
+
+class AsyncDockerClient:
+    """A minimal asyncio client for the Docker Engine API.
+
+    Requests share one aiohttp session whose connector keeps connections to
+    the daemon alive, so container operations neither fork the docker CLI
+    nor occupy a thread from the default executor. tls is a (CA file,
+    client certificate, client key) tuple of paths, any of which may be
+    None; when set, tcp:// daemons are reached over HTTPS, as they must be
+    anywhere but a trusted local network.
+    """
+    API_VERSION = "v1.41"
+
+    def __init__(self, base_url, pool_size=64, timeout=60, tls=None):
+        self.base_url = base_url
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.tls = tls
+        self._session = None
+
+    def _ssl_context(self):
+        ca_file, cert_file, key_file = self.tls
+        context = ssl.create_default_context(cafile=ca_file)
+        if cert_file:
+            context.load_cert_chain(cert_file, key_file)
+        return context
+
+    def _get_session(self):
+        # Created lazily because aiohttp sessions must be bound to the running loop
+        if self._session is None or self._session.closed:
+            if self.base_url.startswith("unix://"):
+                connector = aiohttp.UnixConnector(path=self.base_url[len("unix://"):], limit=self.pool_size)
+                self._root = f"http://docker/{self.API_VERSION}"
+            elif self.tls:
+                connector = aiohttp.TCPConnector(limit=self.pool_size, ssl=self._ssl_context())
+                self._root = f"{self.base_url.replace('tcp://', 'https://', 1).rstrip('/')}/{self.API_VERSION}"
+            else:
+                connector = aiohttp.TCPConnector(limit=self.pool_size)
+                self._root = f"{self.base_url.replace('tcp://', 'http://', 1).rstrip('/')}/{self.API_VERSION}"
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+
+    async def _request(self, method, path, params=None, body=None, timeout=None, raw=False, data=None):
+        """Sends one API request. body is sent as JSON, data as a tar archive."""
+        session = self._get_session()
+        if params:
+            params = {k: (json.dumps(v) if isinstance(v, dict) else str(v).lower() if isinstance(v, bool) else v)
+                      for k, v in params.items() if v is not None}
+        request_timeout = aiohttp.ClientTimeout(total=timeout if timeout is not None else self.timeout)
+        try:
+            if data is not None:
+                payload = {"data": data, "headers": {"Content-Type": "application/x-tar"}}
+            else:
+                payload = {"json": body}
+            async with session.request(method, self._root + path, params=params, timeout=request_timeout, **payload) as response:
+                data = await response.read()
+                if response.status == 404:
+                    raise DockerNotFound(self._error_message(data), response.status)
+                if response.status >= 400:
+                    raise DockerError(self._error_message(data), response.status)
+                if raw:
+                    return data
+                return json.loads(data) if data else None
+        except aiohttp.ClientError as e:
+            raise DockerError(f"Docker daemon request failed: {e}") from e
+        except asyncio.TimeoutError as e:
+            raise DockerError(f"Docker daemon request timed out: {method} {path}") from e
+
+    @staticmethod
+    def _error_message(data):
+        try:
+            return json.loads(data).get("message", data.decode())
+        except (ValueError, AttributeError):
+            return data.decode(errors='replace')
+
+    @timed(DOCKER_SECONDS)
+    async def info(self):
+        return await self._request("GET", "/info")
+
+    @timed(DOCKER_SECONDS)
+    async def list_containers(self, all=True, filters=None):
+        """Lists containers in one call, without inspecting each of them."""
+        return await self._request("GET", "/containers/json", params={"all": all, "filters": filters})
+
+    @timed(DOCKER_SECONDS)
+    async def inspect_container(self, name):
+        return await self._request("GET", f"/containers/{name}/json")
+
+    @timed(DOCKER_SECONDS)
+    async def create_container(self, name, config, pull=True):
+        """Creates a container, pulling its image first if the daemon doesn't have it and pull is set."""
+        try:
+            return await self._request("POST", "/containers/create", params={"name": name}, body=config)
+        except DockerNotFound:
+            if not pull:
+                raise
+            await self.pull_image(config["Image"])
+            return await self._request("POST", "/containers/create", params={"name": name}, body=config)
+
+    @timed(DOCKER_SECONDS)
+    async def start(self, name):
+        await self._request("POST", f"/containers/{name}/start")
+
+    @timed(DOCKER_SECONDS)
+    async def stop(self, name, timeout=10):
+        await self._request("POST", f"/containers/{name}/stop", params={"t": timeout}, timeout=self.timeout + timeout)
+
+    @timed(DOCKER_SECONDS)
+    async def restart(self, name, timeout=10):
+        await self._request("POST", f"/containers/{name}/restart", params={"t": timeout}, timeout=self.timeout + timeout)
+
+    @timed(DOCKER_SECONDS)
+    async def remove(self, name, force=False):
+        await self._request("DELETE", f"/containers/{name}", params={"force": force})
+
+    @timed(DOCKER_SECONDS)
+    async def rename(self, name, new_name):
+        await self._request("POST", f"/containers/{name}/rename", params={"name": new_name})
+
+    @timed(DOCKER_SECONDS)
+    async def stats(self, name):
+        """Returns a single stats sample, including the previous CPU reading for percentages."""
+        return await self._request("GET", f"/containers/{name}/stats", params={"stream": False})
+
+    @timed(DOCKER_SECONDS)
+    async def exec_run(self, name, command, detach=False):
+        """Runs a command in a container. Returns (exit code, stdout) or (None, b'') when detached."""
+        created = await self._request("POST", f"/containers/{name}/exec", body={
+            "Cmd": command, "AttachStdout": not detach, "AttachStderr": not detach
+        })
+        output = await self._request("POST", f"/exec/{created['Id']}/start", body={"Detach": detach, "Tty": False}, raw=True)
+        if detach:
+            return None, b''
+        stdout, _ = demux_docker_stream(output)
+        inspected = await self._request("GET", f"/exec/{created['Id']}/json")
+        return inspected.get("ExitCode"), stdout
+
+    @timed(DOCKER_SECONDS)
+    async def pull_image(self, image):
+        repository, _, tag = image.partition(":")
+        # The pull endpoint streams progress; reading it to the end waits for completion
+        await self._request("POST", "/images/create", params={"fromImage": repository, "tag": tag or "latest"}, timeout=600, raw=True)
+
+    @timed(DOCKER_SECONDS)
+    async def inspect_image(self, name):
+        return await self._request("GET", f"/images/{name}/json")
+
+    @timed(DOCKER_SECONDS)
+    async def build_image(self, context, tag):
+        """Builds an image from an in-memory tar build context, raising DockerError if any step fails."""
+        output = await self._request("POST", "/build", params={"t": tag, "rm": True, "forcerm": True}, timeout=1800, raw=True, data=context)
+        # Build failures are reported inside the 200 progress stream
+        for line in output.splitlines():
+            if line.strip():
+                message = json.loads(line)
+                if "error" in message:
+                    raise DockerError(f"Building {tag} failed: {message['error'].strip()}")
+
+    async def events(self, filters=None):
+        """Yields decoded events from the daemon's event stream until it closes."""
+        session = self._get_session()
+        params = {"filters": json.dumps(filters)} if filters else None
+        try:
+            async with session.get(self._root + "/events", params=params, timeout=aiohttp.ClientTimeout(total=None)) as response:
+                if response.status >= 400:
+                    raise DockerError(self._error_message(await response.read()), response.status)
+                async for line in response.content:
+                    if line.strip():
+                        yield json.loads(line)
+        except aiohttp.ClientError as e:
+            raise DockerError(f"Docker event stream failed: {e}") from e
+
+# --- Control Plane Workers ---
+class ControlPlaneBusy(DockerError):
+    """Raised when too many Docker requests are already waiting on the control-plane workers."""
+
+def _control_worker_main(requests, responses, pool_size):
+    """Entry point of a control-plane worker process."""
+    asyncio.run(_serve_control_requests(requests, responses, pool_size))
+
+async def _serve_control_requests(requests, responses, pool_size):
+    """Performs Docker requests from the front-end until it sends the shutdown sentinel."""
+    loop = asyncio.get_running_loop()
+    clients = {}
+    in_flight = set()
+
+    async def _handle(request_id, base_url, tls, args):
+        if (base_url, tls) not in clients:
+            clients[base_url, tls] = AsyncDockerClient(base_url, pool_size=pool_size, tls=tls)
+        try:
+            responses.put((request_id, True, await clients[base_url, tls]._request(*args)))
+        except DockerError as e:
+            responses.put((request_id, False, e))
+        except Exception as e:
+            responses.put((request_id, False, DockerError(f"Control worker failed: {e}")))
+
+    while (request := await loop.run_in_executor(None, requests.get)) is not None:
+        task = asyncio.create_task(_handle(*request))
+        in_flight.add(task)
+        task.add_done_callback(in_flight.discard)
+    await asyncio.gather(*in_flight)
+    for client in clients.values():
+        await client.close()
@@ -0,0 +1,105 @@
+"""Prometheus-style metrics for the bot.
+
+Importing this module only defines the metric types and an empty registry,
+so control-plane worker processes can use it without loading the bot.
+"""
+import functools
+import logging
+import time
+
+metrics_registry = []
+
+class Histogram:
+    """A Prometheus-style histogram with cumulative buckets, keyed by label values."""
+    DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self.series = {}
+        metrics_registry.append(self)
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        series = self.series.get(key)
+        if series is None:
+            series = self.series[key] = {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                series["buckets"][index] += 1
+        series["sum"] += value
+        series["count"] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, series in sorted(self.series.items()):
+            labels = list(zip(self.labelnames, key))
+            for bound, count in zip(self.buckets, series["buckets"]):
+                lines.append(f"{self.name}_bucket{format_labels(labels + [('le', bound)])} {count}")
+            lines.append(f"{self.name}_bucket{format_labels(labels + [('le', '+Inf')])} {series['count']}")
+            lines.append(f"{self.name}_sum{format_labels(labels)} {series['sum']}")
+            lines.append(f"{self.name}_count{format_labels(labels)} {series['count']}")
+        return lines
+
+class Gauge:
+    """A gauge whose values are read from a callback when the endpoint is scraped.
+
+    collect() returns (label values tuple, value) pairs, so gauges never go
+    stale and nothing has to update them on the hot path.
+    """
+    TYPE = "gauge"
+
+    def __init__(self, name, help, labelnames=(), collect=None):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.collect = collect
+        metrics_registry.append(self)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.TYPE}"]
+        try:
+            samples = list(self.collect())
+        except Exception as e:
+            logging.error(f"Failed to collect metric {self.name}: {e}")
+            samples = []
+        for key, value in samples:
+            lines.append(f"{self.name}{format_labels(list(zip(self.labelnames, key)))} {value}")
+        return lines
+
+class Counter(Gauge):
+    """A callback-read value that only ever goes up, such as a running total since startup."""
+    TYPE = "counter"
+
+def format_labels(labels):
+    """Formats (name, value) pairs as a Prometheus label set."""
+    if not labels:
+        return ""
+    def _escape(value):
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+def render_metrics():
+    """Renders every registered metric in the Prometheus text exposition format."""
+    lines = []
+    for metric in metrics_registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+def timed(histogram):
+    """Decorator recording the duration of each call in histogram, labelled by function name and outcome."""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            outcome = "error"
+            try:
+                result = await func(*args, **kwargs)
+                outcome = "ok"
+                return result
+            finally:
+                histogram.observe(time.perf_counter() - started, operation=func.__name__, outcome=outcome)
+        return wrapper
+    return decorator